@@ -0,0 +1,292 @@
+"""Benchmark the dashboard pipeline on synthetic VAHAN-shaped data.
+
+The four sources are generated with the workbook layouts (same columns, counts
+written with Indian digit grouping like "1,10,490" once they reach four
+digits) and with ``scale`` times as many makers / categories / fuels as the
+real data.  Each stage is timed on its own:
+
+    read_excel    pd.read_excel() of the sources saved as workbooks
+    clean         clean_dataframe() on the raw frames + Arrow cache write
+    load          memory-mapped read of the cleaned Arrow files
+    cube          Cube.from_frames()
+    growth        YOY and QOQ growth views (top 10 makers, every category)
+    market_share  maker market share
+    kpis          KPI row
+    insights      investment insights
+
+Times are the best of ``--repeat`` runs; peak memory is measured in a separate
+run under tracemalloc (Python and numpy allocations, not the Arrow mmap).
+
+    python benchmark.py --scales 10 100 --save bench.json
+    python benchmark.py --scales 10 100 --baseline bench.json --threshold 0.25
+
+With ``--baseline`` the exit code is 1 if any stage got slower or used more
+memory than the baseline by more than the threshold.  Writing the workbooks
+with openpyxl is slow, so read_excel only runs up to ``--excel-max-scale``
+(default 10); larger scales clean the generated frames directly.  1000x needs
+several GB of RAM for the raw frames alone.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube import MONTHS, VEHICLE_CLASSES, Cube
+from engine import (growth_view, investment_insights, kpi_metrics,
+                    top_maker_share)
+from ingest import SOURCES, read_arrow, write_arrow
+from schema import COUNT, SCHEMAS, clean_dataframe, label_column
+
+# Labels per year in the real workbooks, multiplied by the scale factor
+BASE_LABELS = {
+    "maker_category": 1400,
+    "category_month": 16,
+    "maker_month": 1400,
+    "fuel_category": 13,
+}
+# Typical registrations per cell, so categories and fuels get large numbers
+MEAN_COUNT = {
+    "maker_category": 300,
+    "category_month": 50_000,
+    "maker_month": 600,
+    "fuel_category": 150_000,
+}
+LABEL_PREFIX = {
+    "maker_category": "MAKER",
+    "category_month": "CATEGORY",
+    "maker_month": "MAKER",
+    "fuel_category": "FUEL",
+}
+# Makes the insights find an electric and a diesel fuel and the 2W leader
+FIXED_LABELS = {"fuel_category": ["ELECTRIC(BOV)", "DIESEL", "PETROL"],
+                "category_month": ["TWO WHEELER(NT)", "MOTOR CAR"]}
+
+STAGES = ("read_excel", "clean", "load", "cube", "growth", "market_share", "kpis", "insights")
+MIN_SECONDS = 0.005    # differences below this are timer noise
+MIN_PEAK_MB = 1.0
+EXCEL_MAX_SCALE = 10
+
+
+def indian_format(n):
+    """1104900 -> "11,04,900" (last three digits, then groups of two)."""
+    text = str(n)
+    head, tail = text[:-3], text[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ",".join(groups + [tail])
+
+
+def _as_cells(counts):
+    # Workbook cells: small counts are numbers, larger ones grouped strings
+    cells = counts.astype(object)
+    large = counts >= 1000
+    cells[large] = [indian_format(n) for n in counts[large].tolist()]
+    return cells
+
+
+def synth_source(name, scale, years, rng):
+    """Raw frame in the workbook layout of ``name``."""
+    schema = SCHEMAS[name]
+    label = label_column(schema)
+    value_cols = VEHICLE_CLASSES if "2WIC" in schema else MONTHS
+
+    fixed = FIXED_LABELS.get(name, [])
+    count = max(BASE_LABELS[name] * scale, len(fixed) + 1)
+    labels = fixed + [f"{LABEL_PREFIX[name]} {i:07d}"
+                      for i in range(count - len(fixed))]
+
+    frames = []
+    for year in years:
+        # Most makers sell nothing in most columns; a few sell a lot
+        active = rng.random((count, len(value_cols))) < 0.35
+        counts = rng.lognormal(np.log(MEAN_COUNT[name]), 1.5,
+                               (count, len(value_cols))).astype(np.int64) * active
+        frame = pd.DataFrame(_as_cells(counts), columns=value_cols)
+        frame.insert(0, label, labels)
+        frame["Year"] = year
+        frame["Total"] = _as_cells(counts.sum(axis=1))
+        frames.append(frame)
+    raw = pd.concat(frames, ignore_index=True)
+
+    serial = next(iter(schema))
+    if schema[serial] == COUNT:  # "S No" / "S.No" column
+        raw.insert(0, serial, np.arange(1, len(raw) + 1))
+    return raw
+
+
+def synth_sources(scale, n_years=3, seed=0):
+    rng = np.random.default_rng(seed)
+    years = list(range(2020, 2020 + n_years))
+    return {name: synth_source(name, scale, years, rng) for name in SCHEMAS}
+
+
+def write_workbooks(raw, out_dir):
+    """Save the raw frames as workbooks named like the real sources."""
+    for name, df in raw.items():
+        df.to_excel(Path(out_dir) / SOURCES[name], index=False, engine="openpyxl")
+
+
+def _stage_fns(raw, cache_dir):
+    """Stage name -> callable; each stage reads the results of the one before.
+
+    Without workbooks in ``cache_dir`` (see ``write_workbooks()``) there is
+    no read_excel stage and clean starts from the generated frames.
+    """
+    ctx = {"raw": raw}
+
+    def read_excel():
+        ctx["raw"] = {name: pd.read_excel(Path(cache_dir) / SOURCES[name], engine="openpyxl")
+                      for name in raw}
+
+    def clean():
+        ctx["clean"] = {name: clean_dataframe(df, SCHEMAS[name])
+                        for name, df in ctx["raw"].items()}
+        for name, df in ctx["clean"].items():
+            write_arrow(df, Path(cache_dir) / f"{name}.arrow")
+
+    def load():
+        ctx["frames"] = {name: read_arrow(Path(cache_dir) / f"{name}.arrow")
+                         for name in raw}
+
+    def cube():
+        frames = ctx["frames"]
+        ctx["cube"] = Cube.from_frames(
+            frames["maker_category"], frames["category_month"],
+            frames["maker_month"], frames["fuel_category"])
+
+    def growth():
+        cube = ctx["cube"]
+        # __wrapped__ skips the panel cache: every run does the real work
+        makers = cube.maker_month.sum('year', 'month').top_n(10).coords['maker']
+        categories = cube.category_month.coords['category']
+        year = int(cube.maker_month.coords['year'][-1])
+        for view in ("YOY", "QOQ"):
+            growth_view.__wrapped__(cube, 'maker_month', 'maker', makers, view, year)
+            growth_view.__wrapped__(cube, 'category_month', 'category', categories, view, year)
+
+    def market_share():
+        top_maker_share.__wrapped__(ctx["cube"])
+
+    def kpis():
+        kpi_metrics.__wrapped__(ctx["cube"])
+
+    def insights():
+        investment_insights.__wrapped__(ctx["cube"])
+
+    stages = {"read_excel": read_excel, "clean": clean, "load": load, "cube": cube, "growth": growth,
+              "market_share": market_share, "kpis": kpis, "insights": insights}
+    if not (Path(cache_dir) / SOURCES["maker_month"]).exists():
+        del stages["read_excel"]
+    return stages
+
+
+def run_scale(scale, n_years=3, repeat=3, seed=0, excel=True):
+    """{stage: {"seconds": best time, "peak_mb": traced peak}} for one scale.
+
+    With ``excel`` false the read_excel stage is skipped and left out.
+    """
+    raw = synth_sources(scale, n_years, seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if excel:
+            write_workbooks(raw, cache_dir)
+        stages = _stage_fns(raw, cache_dir)
+        for _ in range(repeat):
+            for name in stages:
+                start = time.perf_counter()
+                stages[name]()
+                elapsed = time.perf_counter() - start
+                best = results.setdefault(name, {"seconds": elapsed})
+                best["seconds"] = min(best["seconds"], elapsed)
+
+        tracemalloc.start()
+        try:
+            for name in stages:
+                tracemalloc.reset_peak()
+                base, _ = tracemalloc.get_traced_memory()
+                stages[name]()
+                _, peak = tracemalloc.get_traced_memory()
+                results[name]["peak_mb"] = (peak - base) / 2**20
+        finally:
+            tracemalloc.stop()
+    results["rows"] = {name: len(df) for name, df in raw.items()}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Regressions of ``results`` against ``baseline`` as printable lines."""
+    regressions = []
+    for scale, stages in results.items():
+        for stage in STAGES:
+            old = baseline.get(scale, {}).get(stage)
+            new = stages.get(stage)
+            if old is None or new is None:
+                continue
+            for key, floor in (("seconds", MIN_SECONDS), ("peak_mb", MIN_PEAK_MB)):
+                if new[key] > old[key] * (1 + threshold) and new[key] - old[key] > floor:
+                    regressions.append(
+                        f"{scale}x {stage}: {key} {old[key]:.3f} -> {new[key]:.3f} "
+                        f"(+{(new[key] / old[key] - 1) * 100 if old[key] else float('inf'):.0f}%)")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'scale':>6} {'stage':<13} {'seconds':>9} {'peak MB':>9}")
+    for scale, stages in results.items():
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            print(f"{scale + 'x':>6} {stage:<13} {stages[stage]['seconds']:>9.3f} "
+                  f"{stages[stage]['peak_mb']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the VAHAN pipeline on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100],
+                        help="multiples of the real number of makers/categories/fuels")
+    parser.add_argument("--years", type=int, default=3, help="years per source (default 3)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--excel-max-scale", type=int, default=EXCEL_MAX_SCALE,
+                        help="largest scale that also times read_excel (default 10)")
+    parser.add_argument("--save", type=Path, help="write the results as a baseline JSON")
+    parser.add_argument("--baseline", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown / memory growth vs the baseline (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scales:
+        results[str(scale)] = run_scale(scale, args.years, args.repeat, args.seed,
+                                        excel=scale <= args.excel_max_scale)
+    print_results(results)
+
+    if args.save:
+        args.save.write_text(json.dumps(
+            {"python": platform.python_version(), "numpy": np.__version__,
+             "pandas": pd.__version__, "years": args.years, "results": results},
+            indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline["results"], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no stage regressed by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from cube import MONTHS, VEHICLE_CLASSES, Cube
+from schema import SCHEMAS, clean_dataframe
+
+
+def _raw_frame(label, rows, value_cols=MONTHS, serial=None):
+    """Frame in a workbook layout; each row is (label, year, {column: cell}).
+
+    Columns a row doesn't mention are 0; Total sums the cells that are valid
+    counts, so deliberately bad cells don't make Total a rejected cell too.
+    """
+    records = []
+    for i, (name, year, cells) in enumerate(rows, start=1):
+        record = {serial: i} if serial else {}
+        record.update({label: name, "Year": year})
+        record.update({col: cells.get(col, 0) for col in value_cols})
+        record["Total"] = sum(v for v in cells.values() if isinstance(v, int) and v >= 0)
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def _wide(label, rows, value_cols=MONTHS, serial=None):
+    """``_raw_frame()`` cleaned with the schema of its layout."""
+    schema = next(s for s in SCHEMAS.values() if label in s and value_cols[0] in s)
+    return clean_dataframe(_raw_frame(label, rows, value_cols, serial), schema)
+
+
+@pytest.fixture
+def raw_frame():
+    return _raw_frame
+
+
+@pytest.fixture
+def wide():
+    return _wide
+
+
+def full_year(count):
+    return {month: count for month in MONTHS}
+
+
+@pytest.fixture
+def cube():
+    """HERO (2021-22) and BAJAJ (2022) with every month loaded."""
+    maker_month = _wide("Maker", [("HERO", 2021, full_year(10)),
+                                  ("HERO", 2022, full_year(20)),
+                                  ("BAJAJ", 2022, full_year(5))], MONTHS, "S.No")
+    category_month = _wide("Vehicle Category", [("MOTOR CAR", 2021, full_year(100)),
+                                                ("MOTOR CAR", 2022, full_year(110))],
+                           MONTHS, "S No")
+    maker_category = _wide("Maker", [("HERO", 2022, {"2WN": 240}),
+                                     ("BAJAJ", 2022, {"2WN": 60})], VEHICLE_CLASSES, "S No")
+    fuel_category = _wide("Fuel", [("PETROL", 2022, {"2WN": 300})], VEHICLE_CLASSES)
+    return Cube.from_frames(maker_category, category_month, maker_month, fuel_category)
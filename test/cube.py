@@ -0,0 +1,285 @@
+"""Pre-aggregated registration cube for the dashboard panels.
+
+The four VAHAN sources don't cross each other's dimensions (the maker tables
+have no fuel, the fuel table has no maker), so the cube is a set of dense
+integer tables that share the same labelled-axis API:
+
+    maker_month     year x maker x month
+    category_month  year x category x month
+    maker_class     year x maker x vclass
+    fuel_class      year x fuel x vclass
+
+Everything is built once at load.  Panels slice the labels they need with
+``Table.sel()`` and roll up with ``Table.sum()``, so the cost of an
+interaction grows with the selection rather than with the number of makers.
+"""
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+          'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+VEHICLE_CLASSES = ["2WIC", "2WN", "2WT", "3WIC", "3WN", "3WT",
+                   "4WIC", "HGV", "HMV", "HPV", "LGV", "LMV",
+                   "LPV", "MGV", "MMV", "MPV", "OTH"]
+
+# Numbers every Cube built in this process, see Cube.token
+_cube_tokens = itertools.count()
+
+# Column names used when a table is turned back into pandas
+COLUMN_NAMES = {
+    "year": "Year",
+    "maker": "Maker",
+    "category": "Vehicle Category",
+    "fuel": "Fuel",
+    "month": "Month",
+    "quarter": "Quarter",
+    "vclass": "Vehicle Class",
+}
+
+
+class Table:
+    """Dense array of registration counts with one label array per axis."""
+
+    def __init__(self, dims, coords, values):
+        self.dims = tuple(dims)
+        self.coords = {dim: np.asarray(coords[dim]) for dim in self.dims}
+        self.values = values
+        self._index = {}
+
+    def _lookup(self, dim):
+        # pd.Index builds its hash table once, later lookups are O(labels)
+        if dim not in self._index:
+            self._index[dim] = pd.Index(self.coords[dim])
+        return self._index[dim]
+
+    def sel(self, **selection):
+        """Select labels per dimension.
+
+        A list keeps the dimension (unknown labels are skipped, order is
+        kept); a scalar drops it and raises KeyError if it is missing.
+        """
+        dims = list(self.dims)
+        coords = dict(self.coords)
+        values = self.values
+        for dim, labels in selection.items():
+            axis = dims.index(dim)
+            if np.ndim(labels) == 0:
+                pos = self._lookup(dim).get_loc(labels)
+                values = np.take(values, pos, axis=axis)
+                dims.pop(axis)
+                coords.pop(dim)
+            else:
+                pos = self._lookup(dim).get_indexer(list(labels))
+                pos = pos[pos >= 0]
+                values = np.take(values, pos, axis=axis)
+                coords[dim] = self.coords[dim][pos]
+        return Table(dims, coords, values)
+
+    def sum(self, *dims):
+        """Roll up (sum out) the given dimensions."""
+        axes = tuple(self.dims.index(dim) for dim in dims)
+        values = self.values.sum(axis=axes, dtype=np.int64)
+        rest = [dim for dim in self.dims if dim not in dims]
+        return Table(rest, {dim: self.coords[dim] for dim in rest}, values)
+
+    def by_quarter(self):
+        """Fold the month axis into calendar quarters."""
+        axis = self.dims.index("month")
+        shape = self.values.shape
+        values = self.values.reshape(
+            shape[:axis] + (4, 3) + shape[axis + 1:]).sum(axis=axis + 1)
+        dims = self.dims[:axis] + ("quarter",) + self.dims[axis + 1:]
+        coords = dict(self.coords, quarter=QUARTERS)
+        return Table(dims, coords, values)
+
+    def top_n(self, n):
+        """Largest ``n`` entries of a 1-D table, in descending order."""
+        values = self.values
+        if n <= 0:
+            pos = np.arange(0)
+        elif n < len(values):
+            pos = np.argpartition(values, -n)[-n:]
+        else:
+            pos = np.arange(len(values))
+        pos = pos[np.argsort(-values[pos], kind="stable")]
+        dim = self.dims[0]
+        return Table(self.dims, {dim: self.coords[dim][pos]}, values[pos])
+
+    def with_cells(self, cells, values):
+        """Copy of the table with single cells overwritten.
+
+        ``cells`` holds one label array per dimension.  Labels that aren't
+        on an axis yet (a new year or maker) are added in sorted order.  The
+        table itself is left untouched, so readers never see it half-updated.
+        """
+        table = Table(self.dims, self.coords, self.values.copy())
+        for dim in self.dims:
+            missing = np.setdiff1d(np.asarray(cells[dim]), self.coords[dim])
+            if len(missing):
+                table = table._grown(dim, missing)
+        pos = tuple(table._lookup(dim).get_indexer(np.asarray(cells[dim]))
+                    for dim in table.dims)
+        table.values[pos] = values
+        return table
+
+    def _grown(self, dim, labels):
+        axis = self.dims.index(dim)
+        merged = np.union1d(self.coords[dim], labels)
+        shape = list(self.values.shape)
+        shape[axis] = len(merged)
+        grown = np.zeros(shape, dtype=self.values.dtype)
+        target = [slice(None)] * len(shape)
+        target[axis] = np.searchsorted(merged, self.coords[dim])
+        grown[tuple(target)] = self.values
+        return Table(self.dims, dict(self.coords, **{dim: merged}), grown)
+
+    def _axis_index(self, dim):
+        return pd.Index(self.coords[dim], name=COLUMN_NAMES.get(dim, dim))
+
+    def to_pandas(self):
+        """Series for a 1-D table, DataFrame (first dim as index) for 2-D."""
+        if len(self.dims) == 1:
+            return pd.Series(self.values, index=self._axis_index(self.dims[0]))
+        if len(self.dims) == 2:
+            return pd.DataFrame(self.values,
+                                index=self._axis_index(self.dims[0]),
+                                columns=self._axis_index(self.dims[1]))
+        raise ValueError("to_pandas() needs a 1-D or 2-D table, "
+                         f"got dims {self.dims}")
+
+    def to_frame(self, value_name):
+        """Long format frame, one row per cell."""
+        index = pd.MultiIndex.from_product(
+            [self._axis_index(dim) for dim in self.dims])
+        frame = index.to_frame(index=False)
+        frame[value_name] = self.values.ravel()
+        return frame
+
+
+def pct_change(table, dim):
+    """Growth (%) of the last label along ``dim`` over the label before it.
+
+    Cells whose previous value is 0 come back as NaN.
+    """
+    axis = table.dims.index(dim)
+    rest = [d for d in table.dims if d != dim]
+    coords = {d: table.coords[d] for d in rest}
+    if table.values.shape[axis] < 2:
+        shape = tuple(len(coords[d]) for d in rest)
+        return Table(rest, coords, np.full(shape, np.nan))
+    latest = np.take(table.values, -1, axis=axis).astype(float)
+    prev = np.take(table.values, -2, axis=axis).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(prev != 0, (latest - prev) / prev * 100, np.nan)
+    return Table(rest, coords, growth)
+
+
+def yoy(table):
+    return pct_change(table, "year")
+
+
+def qoq(table, quarters=QUARTERS):
+    return pct_change(table.by_quarter().sel(quarter=list(quarters)), "quarter")
+
+
+def loaded_months(table):
+    """Year x month mask of the months that have any registrations.
+
+    Monthly extracts fill a year one month at a time; a month no extract
+    has reached yet is zero for every label.
+    """
+    rest = [dim for dim in table.dims if dim not in ("year", "month")]
+    return table.sum(*rest).values > 0
+
+
+def complete_years(table):
+    """Year labels of a year x ... x month table, minus a partial last year."""
+    years = table.coords["year"]
+    if len(years) and not loaded_months(table)[-1].all():
+        return years[:-1]
+    return years
+
+
+def complete_quarters(table, year):
+    """Quarters of ``year`` whose three months are all loaded."""
+    years = table.coords["year"]
+    if year not in years:
+        return QUARTERS
+    mask = loaded_months(table)[np.searchsorted(years, year)]
+    return [quarter for quarter, full in zip(QUARTERS, mask.reshape(4, 3).all(axis=1))
+            if full]
+
+
+def share(table, dim):
+    """Percentage of the total along ``dim``."""
+    axis = table.dims.index(dim)
+    totals = table.values.sum(axis=axis, keepdims=True, dtype=np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(totals != 0, table.values / totals * 100, 0.0)
+    return Table(table.dims, table.coords, values)
+
+
+def from_wide(df, key_col, key_dim, value_cols, value_dim):
+    """Build a year x key x value table from a wide frame cleaned by schema.py."""
+    df = df[df["Year"].notna() & df[key_col].notna()]
+    year_labels = df["Year"].astype(int).to_numpy()
+    years = np.unique(year_labels)
+    year_codes = np.searchsorted(years, year_labels)
+    key_codes, keys = pd.factorize(df[key_col], sort=True)
+
+    counts = df[value_cols].to_numpy(dtype=np.int64, na_value=0)
+    values = np.zeros((len(years), len(keys), len(value_cols)), dtype=np.int32)
+    np.add.at(values, (year_codes, key_codes), counts)
+    coords = {"year": years, key_dim: np.asarray(keys), value_dim: value_cols}
+    return Table(("year", key_dim, value_dim), coords, values)
+
+
+class Cube:
+    def __init__(self, maker_month, category_month, maker_class, fuel_class,
+                 version=0):
+        self.maker_month = maker_month
+        self.category_month = category_month
+        self.maker_class = maker_class
+        self.fuel_class = fuel_class
+        # Dataset version (last applied delta, see ingest.py) the cube reflects
+        self.version = version
+        # Tells cubes apart that share a version, e.g. one rebuilt after a
+        # workbook changed; panel_cache keys results on (token, version)
+        self.token = next(_cube_tokens)
+        # Serialises writers (sync_cube); readers rely on apply_cells() swapping tables
+        self.lock = threading.Lock()
+
+    def apply_cells(self, name, key_dim, cells):
+        """Upsert long-format monthly cells (Year, key, Month, Registrations).
+
+        The updated table replaces the old one in a single assignment, so
+        sessions reading the cube without the lock see one or the other.
+        """
+        table = getattr(self, name)
+        updated = table.with_cells({
+            "year": cells["Year"].astype(int).to_numpy(),
+            key_dim: cells[COLUMN_NAMES[key_dim]].astype(object).to_numpy(),
+            "month": cells["Month"].astype(object).to_numpy(),
+        }, cells["Registrations"].to_numpy())
+        setattr(self, name, updated)
+
+    @classmethod
+    def from_frames(cls, df_maker_category, df_category_month,
+                    df_maker_month, df_fuel_category, version=0):
+        return cls(
+            maker_month=from_wide(
+                df_maker_month, "Maker", "maker", MONTHS, "month"),
+            category_month=from_wide(
+                df_category_month, "Vehicle Category", "category",
+                MONTHS, "month"),
+            maker_class=from_wide(
+                df_maker_category, "Maker", "maker", VEHICLE_CLASSES,
+                "vclass"),
+            fuel_class=from_wide(
+                df_fuel_category, "Fuel", "fuel", VEHICLE_CLASSES, "vclass"),
+            version=version,
+        )
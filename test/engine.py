@@ -0,0 +1,325 @@
+"""Headless analytics behind the dashboard panels.
+
+Everything here works on a ``cube.Cube`` and returns plain pandas objects, so
+it can be imported without Streamlit (``report.py`` drives it from a process
+pool).  Results are memoized per dataset version through ``panel_cache``; they
+are shared between callers and must be treated as read-only.
+"""
+import numpy as np
+import pandas as pd
+
+from cube import (MONTHS, Cube, complete_quarters, complete_years, loaded_months,
+                  qoq, share, yoy)
+from ingest import CACHE_DIR, dataset_version, load_sources
+from panel_cache import memoize
+
+# Categories whose previous year is below this aren't ranked by growth
+MIN_BASE = 20000
+
+
+def build_cube(cache_dir=CACHE_DIR):
+    """Load the cleaned sources (plus appended extracts) into a Cube."""
+    # Read the version first: a delta appended meanwhile is picked up by sync_cube()
+    version = dataset_version(cache_dir)
+    sources = load_sources(cache_dir)
+    return Cube.from_frames(
+        sources["maker_category"], sources["category_month"],
+        sources["maker_month"], sources["fuel_category"], version=version)
+
+
+def fastest_growing_category(cube, year, min_base=MIN_BASE):
+    """(category, growth %) of the fastest growing category in ``year``.
+
+    Categories with fewer than ``min_base`` registrations the year before are
+    skipped; returns (None, nan) if none is left.
+    """
+    category_year = cube.category_month.sum('month').sel(year=[year - 1, year])
+    if len(category_year.coords['year']) < 2:
+        return None, np.nan
+    cat_prev, cat_curr = category_year.to_pandas().to_numpy()
+    categories = category_year.coords['category']
+
+    # A category with no registrations the year before has no growth rate
+    valid = (cat_prev >= min_base) & (cat_prev > 0)
+    if not valid.any():
+        return None, np.nan
+    growth = (cat_curr[valid] - cat_prev[valid]) / cat_prev[valid] * 100
+    top = np.argsort(-growth, kind="stable")[0]
+    return categories[valid][top], growth[top]
+
+
+# KPI numbers don't depend on any filter: computed once per dataset version
+@memoize(filtered=False)
+def kpi_metrics(cube):
+    # --- Determine latest year ---
+    latest_year = int(cube.maker_class.coords['year'].max())
+    prev_year = latest_year - 1
+
+    # --- 1️⃣ Total Registrations ---
+    total_per_year = cube.maker_class.sum('maker', 'vclass').to_pandas()
+    total_all_years = total_per_year.sum()
+    total_latest = total_per_year.get(latest_year, 0)
+    total_prev = total_per_year.get(prev_year, 0)
+    yoy_all = ((total_latest - total_prev) / total_prev * 100) if total_prev else 0
+
+    # --- 2️⃣ EV Market Share ---
+    # Year x Fuel totals (summed over vehicle classes)
+    fuel_year = cube.fuel_class.sum('vclass').to_pandas()
+    ev_fuels = fuel_year.columns[fuel_year.columns.str.contains("ELECTRIC", case=False)]
+
+    ev_total_all = fuel_year[ev_fuels].to_numpy().sum()
+    market_total_all = fuel_year.to_numpy().sum()
+    ev_share_all = (ev_total_all / market_total_all *
+                    100) if market_total_all else 0
+
+    ev_share_latest = fuel_year.loc[latest_year, ev_fuels].sum() / \
+        fuel_year.loc[latest_year].sum() * 100
+
+    ev_share_prev = fuel_year.loc[prev_year, ev_fuels].sum() / \
+        fuel_year.loc[prev_year].sum() * 100
+
+    ev_yoy_all = ev_share_latest - ev_share_prev
+
+    # --- 3️⃣ Two-Wheeler Share ---
+    category_all = cube.category_month.sum('year', 'month').to_pandas()
+    two_wheeler_all = category_all[category_all.index.str.contains(
+        "TWO WHEELER", case=False)].sum()
+    market_all = category_all.sum()
+    two_share_all = (two_wheeler_all / market_all * 100) if market_all else 0
+
+    # --- 4️⃣ Fastest Growing Category ---
+    top_cat_all, top_growth_all = fastest_growing_category(cube, latest_year)
+
+    # --- 5️⃣ Top Manufacturer ---
+    maker_all = cube.maker_class.sum('year', 'vclass').to_pandas()
+    top_maker_all = maker_all.idxmax()
+    top_share_all = maker_all.max() / maker_all.sum() * 100
+
+    return {
+        'total_all_years': total_all_years,
+        'yoy_all': yoy_all,
+        'ev_share_all': ev_share_all,
+        'ev_yoy_all': ev_yoy_all,
+        'two_share_all': two_share_all,
+        'top_cat_all': top_cat_all,
+        'top_growth_all': top_growth_all,
+        'top_maker_all': top_maker_all,
+        'top_share_all': top_share_all,
+    }
+
+
+# Growth chart data and % change per selected maker/category
+@memoize
+def growth_view(cube, table_name, key_dim, labels, view, year):
+    # Slice the selected labels out of the Year x Label x Month cube
+    full = getattr(cube, table_name)
+    table = full.sel(**{key_dim: list(labels)})
+    if view == "YOY":
+        # A year still being appended month by month would compare a few
+        # months against a full year: leave it out until it is complete
+        yearly = table.sel(year=complete_years(full)).sum('month')
+        return yearly.to_frame('Registrations'), yoy(yearly).to_pandas()
+    # Same for the quarter a year being appended is still in
+    quarters = complete_quarters(full, year)
+    year_table = table.sel(year=[year]).sum('year')
+    return (year_table.by_quarter().sel(quarter=quarters).to_frame('Registrations'),
+            qoq(year_table, quarters).to_pandas())
+
+
+# Market share doesn't depend on any filter: computed once per dataset version
+@memoize(filtered=False)
+def top_maker_share(cube, n=5):
+    # Calculate market share % and keep the Top n manufacturers
+    maker_share = share(cube.maker_class.sum('year', 'vclass'), 'maker').top_n(n)
+    return maker_share.to_pandas().rename("Market Share (%)").reset_index()
+
+
+# ---- Performance Classification Function ----
+def classify_performance(yoy_growth):
+    if pd.isna(yoy_growth):
+        return "N/A"
+    elif yoy_growth >= 10:
+        return "High"
+    elif yoy_growth >= 0:
+        return "Medium"
+    else:
+        return "Low"
+
+
+# Fuel World tables don't depend on any filter: computed once per dataset version
+@memoize(filtered=False)
+def fuel_world_tables(cube):
+    # ---- Calculate Top 5 Fuels ----
+    fuel_totals = cube.fuel_class.sum('year', 'vclass')
+
+    top_5_fuels = fuel_totals.top_n(5).to_pandas().rename("Total").reset_index()
+    total_market = top_5_fuels["Total"].sum()
+    top_5_fuels["Market Share (%)"] = (
+        top_5_fuels["Total"] / total_market
+    ) * 100
+
+    # ---- YoY Growth for Fuels (latest year vs the year before) ----
+    fuel_yoy_data = yoy(cube.fuel_class.sum('vclass')).to_pandas() \
+        .round(1).rename('YoY_Growth').reset_index()
+    performance_table = pd.merge(
+        top_5_fuels[['Fuel', 'Market Share (%)']],
+        fuel_yoy_data[['Fuel', 'YoY_Growth']],
+        on='Fuel',
+        how='left'
+    )
+    performance_table['Performance'] = performance_table['YoY_Growth'].apply(classify_performance)
+
+    # --- Find top vehicle category for each fuel (summed across all years) ---
+    fuel_vehicle = cube.fuel_class.sum('year').sel(fuel=top_5_fuels["Fuel"]).to_pandas()
+    df_top_vehicle = pd.DataFrame({
+        "Fuel": fuel_vehicle.index,
+        "Top Vehicle Category": fuel_vehicle.idxmax(axis=1).to_numpy(),
+        "Units": fuel_vehicle.max(axis=1).to_numpy(),
+    })
+
+    # --- Merge with market share info ---
+    result_table = top_5_fuels.merge(df_top_vehicle, on="Fuel")
+
+    return top_5_fuels, performance_table, result_table
+
+
+# Top categories and their leading maker for one year
+@memoize
+def top_category_makers(cube, year):
+    # --- Prepare data ---
+    year_table = cube.maker_class.sel(year=[int(year)]).sum('year')
+    category_totals = year_table.sum('maker').top_n(5)
+    top_5 = category_totals.to_pandas().reset_index()
+    top_5.columns = ['Vehicle Category', 'Total Units Sold']
+
+    # Calculate total market for percentage calculation
+    total_market = top_5['Total Units Sold'].sum()
+
+    # Top maker per category: argmax down the maker axis
+    top_5_table = year_table.sel(vclass=top_5['Vehicle Category'])
+    leader_pos = top_5_table.values.argmax(axis=0)
+    top_makers_df = pd.DataFrame({
+        'Vehicle Category': top_5_table.coords['vclass'],
+        'Top Maker': top_5_table.coords['maker'][leader_pos],
+        'Units Sold': top_5_table.values[leader_pos, np.arange(len(leader_pos))].astype(int)
+    })
+    merged_df = top_5.merge(top_makers_df, on='Vehicle Category')
+
+    # Add category share calculation
+    merged_df['Category Share (%)'] = (merged_df['Total Units Sold'] / total_market * 100).round(1)
+
+    return merged_df
+
+
+# Investment insights don't depend on any filter: computed once per dataset version
+@memoize(filtered=False)
+def investment_insights(cube):
+    # Year x Fuel totals (summed over vehicle classes)
+    fuel_year = cube.fuel_class.sum('vclass').to_pandas()
+    ev_fuels = fuel_year.columns[fuel_year.columns.str.contains("ELECTRIC", case=False)]
+
+    # --- 1. Electric Vehicles Growth ---
+    ev_per_year = fuel_year[ev_fuels].sum(axis=1)
+    ev_growth = ((ev_per_year.iloc[-1] - ev_per_year.iloc[-2]) / ev_per_year.iloc[-2]) * 100 if len(ev_per_year) > 1 else 0
+
+    # --- 2. Top Manufacturer in 2-Wheelers ---
+    two_wheelers_cols = ['2WIC', '2WN', '2WT']
+    maker_2w_totals = cube.maker_class.sel(vclass=two_wheelers_cols).sum('year', 'vclass').to_pandas()
+    top_maker = maker_2w_totals.idxmax()
+    top_maker_share = (maker_2w_totals.max() / maker_2w_totals.sum()) * 100
+
+    # Identify new/emerging players
+    maker_year_total = cube.maker_class.sum('vclass').to_pandas()
+    this_year = maker_year_total.index[-1]
+
+    # Filter makers that were not present last year
+    previous_year = maker_year_total.index[-2]
+    new_players = maker_year_total.loc[this_year][(maker_year_total.loc[previous_year] == 0) & (maker_year_total.loc[this_year] > 1000)]
+
+    # Pick top emerging player based on absolute units
+    if not new_players.empty:
+        top_emerging_maker = new_players.sort_values(ascending=False).head(1)
+        name = top_emerging_maker.index[0]
+        units = int(top_emerging_maker.iloc[0])
+        entrant = f"⚡ {name} Makes a Bold Entry\nDebuts with {units:,} units—strong momentum in the commercial EV space."
+    else:
+        entrant = "⚡ No Major New Entrants\nNo new manufacturer crossed 1,000 units this year."
+
+    # --- 4. Diesel Decline ---
+    # --- Diesel Decline Insight (Pure Diesel Only) ---
+
+    # Only the column for exactly 'DIESEL', total registrations per year
+    diesel_per_year = fuel_year[fuel_year.columns[fuel_year.columns.str.upper() == 'DIESEL']].sum(axis=1).sort_index()
+
+    # Calculate Year-over-Year change safely
+    if len(diesel_per_year) > 1:
+        last_year = diesel_per_year.index[-2]
+        this_year = diesel_per_year.index[-1]
+        diesel_change = ((diesel_per_year[this_year] - diesel_per_year[last_year]) / diesel_per_year[last_year]) * 100
+    else:
+        diesel_change = 0
+
+    # Add + or - sign
+    sign = "+" if diesel_change >= 0 else "-"
+    diesel_change_str = f"{sign}{abs(diesel_change):.1f}%"
+
+    # --- 5. Heavy Vehicles Growth (HGV + HMV) ---
+    hv_per_year = cube.maker_class.sel(vclass=['HGV', 'HMV']).sum('maker', 'vclass').to_pandas()
+    hv_growth = ((hv_per_year.iloc[-1] - hv_per_year.iloc[-2]) / hv_per_year.iloc[-2]) * 100 if len(hv_per_year) > 1 else 0
+
+    return [
+        f"🚗 EVs Are on Fire\nRegistrations soared {ev_growth:.1f}% YoY—prime time to invest in EV startups, battery tech, and charging infra.",
+        f"🏍️ {top_maker} Holds the Throne\nWith {top_maker_share:.1f}% in 2-wheelers, {top_maker} stays dominant—stable, high-volume, and trusted.",
+        entrant,
+        f"🛢️ Diesel Isn’t Done Yet\nRegistrations rose {diesel_change_str} YoY—still holding ground as cleaner tech gains pace.",
+        f"🚚 Heavy Vehicles on the Move\nHGV & HMV up {hv_growth:.1f}% YoY—driven by infrastructure and logistics boom."
+    ]
+
+
+# --- Maker group reports (report.py) ---
+
+def top_makers(cube, n):
+    """The ``n`` makers with the most registrations over all years."""
+    return cube.maker_month.sum('year', 'month').top_n(n).coords['maker'].tolist()
+
+
+@memoize
+def maker_group_report(cube, year, makers):
+    """Tables describing ``makers`` in ``year``, keyed by table name.
+
+    summary   registrations, YoY and QoQ growth (%) and market share (%) per maker
+    monthly   registrations per maker and month
+    segments  top vehicle categories of the year and their leading maker
+    """
+    year = int(year)
+    months = cube.maker_month.sel(maker=list(makers))
+
+    # YoY on the months loaded for ``year`` so far (all 12 unless it is
+    # still being appended), against the same months the year before
+    years = cube.maker_month.coords['year']
+    loaded = MONTHS
+    if year in years:
+        mask = loaded_months(cube.maker_month)[np.searchsorted(years, year)]
+        loaded = [month for month, ok in zip(MONTHS, mask) if ok]
+    two_years = months.sel(year=[year - 1, year], month=loaded).sum('month')
+    this_year = months.sel(year=[year]).sum('year')
+
+    # Share of the whole market that year, not of the group
+    market = cube.maker_class.sel(year=[year]).sum('year', 'vclass')
+    market_share = share(market, 'maker').sel(maker=this_year.coords['maker'])
+
+    summary = this_year.sum('month').to_pandas().rename("Registrations").to_frame()
+    summary["YoY Growth (%)"] = yoy(two_years).to_pandas()
+    summary["QoQ Growth (%)"] = qoq(this_year, complete_quarters(cube.maker_month, year)).to_pandas()
+    summary["Market Share (%)"] = market_share.to_pandas()
+    summary = summary.reset_index()
+    summary.insert(0, "Year", year)
+
+    monthly = this_year.to_frame("Registrations")
+    monthly.insert(0, "Year", year)
+
+    return {
+        "summary": summary,
+        "monthly": monthly,
+        "segments": top_category_makers(cube, year),
+    }
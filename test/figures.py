@@ -0,0 +1,133 @@
+"""Plotly figures for the dashboard charts, built once per dataset version.
+
+Figures are memoized like the panel results, so a rerun with the same
+filters skips building them with plotly express.  That only saves CPU:
+Streamlit still serializes the figure and sends it to the browser on every
+rerun.  What keeps the payload small is that line charts show at most
+``MAX_TRACES`` series: the largest ones by registrations, plus one
+"Others (n)" series summing the rest, so comparing 50 makers doesn't ship 50
+traces.
+
+    VAHAN_MAX_TRACES  series per line chart before grouping (default 10)
+"""
+import os
+
+import pandas as pd
+
+from cube import COLUMN_NAMES
+from engine import fuel_world_tables, growth_view, top_maker_share
+from panel_cache import memoize
+
+MAX_TRACES = int(os.environ.get("VAHAN_MAX_TRACES", 10))
+
+
+def cap_traces(frame, color, value="Registrations", top_n=MAX_TRACES):
+    """Keep the ``top_n`` largest ``color`` series, sum the rest as "Others".
+
+    ``frame`` is long format (one row per series and x value); series order
+    is kept and the Others series comes last.
+    """
+    totals = frame.groupby(color, sort=False)[value].sum()
+    if len(totals) <= top_n:
+        return frame
+    keep = totals.nlargest(top_n).index
+    shown = frame[frame[color].isin(keep)]
+    rest = frame[~frame[color].isin(keep)]
+
+    x_cols = [col for col in frame.columns if col not in (color, value)]
+    others = rest.groupby(x_cols, sort=False, as_index=False)[value].sum()
+    others[color] = f"Others ({len(totals) - top_n})"
+    return pd.concat([shown, others[frame.columns]], ignore_index=True)
+
+
+@memoize
+def growth_figure(cube, table_name, key_dim, labels, view, year, y_title):
+    """YOY (per year) or QOQ (per quarter of ``year``) line chart."""
+    import plotly.express as px
+
+    df_growth, _ = growth_view(cube, table_name, key_dim, labels, view, year)
+    color = COLUMN_NAMES[key_dim]
+    x = "Year" if view == "YOY" else "Quarter"
+    fig = px.line(cap_traces(df_growth, color), x=x, y="Registrations",
+                  color=color, markers=True, title="")
+
+    # Style the chart
+    fig.update_layout(
+        height=300,
+        xaxis_title="",
+        yaxis_title=y_title,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+    return fig
+
+
+@memoize(filtered=False)
+def market_share_figure(cube):
+    import plotly.express as px
+
+    df_market = top_maker_share(cube).copy()
+
+    # Shorten names for x-axis (but keep full name in hover)
+    df_market["Short Name"] = df_market["Maker"].apply(
+        lambda x: x.split()[0][:6] + "..." if len(x) > 8 else x)
+
+    # Create bar chart
+    market_fig = px.bar(
+        df_market,
+        x="Short Name",
+        y="Market Share (%)",
+        color="Maker",  # Color by original Maker for legend consistency
+        text="Market Share (%)",
+        hover_name="Maker",  # Show full name on hover
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+        height=335  # Taller chart
+    )
+
+    # Format chart
+    market_fig.update_traces(
+        texttemplate='%{text:.1f}%',
+        textposition='outside',
+        marker_line_width=1,
+        marker_line_color='black'
+    )
+
+    market_fig.update_layout(
+        showlegend=False,
+        xaxis_title=None,
+        yaxis_title=None,
+        xaxis_tickangle=0,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=20, r=20, t=40, b=20),
+        yaxis_range=[0, df_market["Market Share (%)"].max() * 1.3],
+        font=dict(size=13)
+    )
+    return market_fig
+
+
+@memoize(filtered=False)
+def fuel_share_figure(cube):
+    import plotly.express as px
+
+    top_5_fuels, _, _ = fuel_world_tables(cube)
+    fig = px.pie(
+        top_5_fuels,
+        names="Fuel",
+        values="Market Share (%)",
+        # title="Market Share Distribution - Top 5 Fuels",
+        hole=0.5,
+        color_discrete_sequence=px.colors.sequential.Tealgrn
+    )
+    fig.update_traces(
+        textinfo="percent+label",
+        pull=[0.05] * len(top_5_fuels),
+        textfont_size=12
+    )
+    return fig
@@ -0,0 +1,299 @@
+"""Columnar ingest cache for the VAHAN workbooks.
+
+Each source workbook is parsed with openpyxl once, cleaned, and written to an
+uncompressed Arrow IPC file under ``.vahan_cache/``.  The file name carries a
+fingerprint of the workbook (content hash + mtime), so editing or replacing a
+workbook invalidates its cache entry automatically.  Later starts memory-map
+the Arrow file instead of re-parsing the xlsx, which keeps cold start fast and
+lets every worker process share the same pages of the OS page cache.
+
+New monthly extracts (same layout as the maker-month or category-month
+workbook) are appended with ``python ingest.py append <file>``.  An append is
+validated against the source schema and stored as a small delta file of
+changed (Year, Maker/Category, Month) cells; ``load_source()`` upserts the
+deltas over the workbook data and ``sync_cube()`` applies new deltas to an
+already-built cube, so a running dashboard picks them up on its next rerun.
+Appends are expected to run one at a time (e.g. from a monthly job).
+
+Run ``python ingest.py`` to pre-build the cache (e.g. in a container build).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from cube import MONTHS
+from instrument import span
+from schema import SCHEMAS, clean_dataframe, coerce_dtypes, label_column
+
+DATA_DIR = Path(__file__).resolve().parent
+CACHE_DIR = DATA_DIR / ".vahan_cache"
+DELTA_DIR = "deltas"
+
+# Bump when clean_dataframe() or SCHEMAS change so stale cache files are not reused
+INGEST_VERSION = 2
+
+# Schema metadata key holding the per-column rejected cell counts
+REJECTED_KEY = b"vahan.rejected_cells"
+
+SOURCES = {
+    "maker_category": "reportTable 2020 - 22.xlsx",
+    "category_month": "month wise v category 20-22.xlsx",
+    "maker_month": "Maker Month Wise Data  20-22.xlsx",
+    "fuel_category": "fuel Vehicle data 20-23.xlsx",
+}
+
+# Sources that accept monthly extracts, with the cube axis of their label
+APPENDABLE = {
+    "maker_month": "maker",
+    "category_month": "category",
+}
+
+
+def source_fingerprint(path):
+    """Short key built from the workbook's content hash and mtime."""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    digest.update(f"{stat.st_mtime_ns}:{INGEST_VERSION}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _cache_path(name, fingerprint, cache_dir):
+    return Path(cache_dir) / f"{name}-{fingerprint}.arrow"
+
+
+def write_arrow(df, path):
+    """Write ``df`` and its rejected-cell counts as an Arrow IPC file."""
+    # Write to a temp file first so concurrent workers never see a partial file
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[REJECTED_KEY] = json.dumps(df.attrs.get("rejected_cells", {}))
+    table = table.replace_schema_metadata(metadata)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_arrow(path):
+    """Read a file written by ``write_arrow()`` back into a frame."""
+    # Memory-mapped read: numeric columns are handed to pandas without a copy.
+    # Closing the file keeps the mapping alive until the frame's buffers go.
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    df = table.to_pandas(split_blocks=True)
+    df.attrs["rejected_cells"] = json.loads(
+        (table.schema.metadata or {}).get(REJECTED_KEY, b"{}"))
+    return df
+
+
+def _drop_stale(name, keep, cache_dir):
+    for old in Path(cache_dir).glob(f"{name}-*.arrow"):
+        if old != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def build_source(name, cache_dir=CACHE_DIR):
+    """Parse one workbook, clean it, and write its Arrow cache file."""
+    workbook = DATA_DIR / SOURCES[name]
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = _cache_path(name, source_fingerprint(workbook), cache_dir)
+
+    with span(f"read_excel:{name}"):
+        raw = pd.read_excel(workbook, engine="openpyxl")
+    with span(f"clean_dataframe:{name}"):
+        df = clean_dataframe(raw, SCHEMAS[name])
+    write_arrow(df, path)
+    _drop_stale(name, path, cache_dir)
+    return path
+
+
+def load_source(name, cache_dir=CACHE_DIR):
+    """Return the cleaned frame for ``name``, building its cache if needed.
+
+    Appended monthly extracts are upserted over the workbook data.
+    """
+    workbook = DATA_DIR / SOURCES[name]
+    path = _cache_path(name, source_fingerprint(workbook), cache_dir)
+    if not path.exists():
+        path = build_source(name, cache_dir)
+    with span(f"load_arrow:{name}"):
+        df = read_arrow(path)
+    deltas = [cells for _, _, cells in read_deltas(cache_dir=cache_dir, name=name)]
+    if deltas:
+        with span(f"upsert_deltas:{name}"):
+            df = upsert_cells(df, pd.concat(deltas, ignore_index=True), name)
+    return df
+
+
+def load_sources(cache_dir=CACHE_DIR):
+    return {name: load_source(name, cache_dir) for name in SOURCES}
+
+
+# --- Monthly extracts ---
+
+def read_extract(path):
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        return pd.read_csv(path, dtype=object)
+    return pd.read_excel(path, engine="openpyxl")
+
+
+def detect_source(raw):
+    for name in APPENDABLE:
+        if label_column(SCHEMAS[name]) in raw.columns:
+            return name
+    raise ValueError("extract has neither a 'Maker' nor a 'Vehicle Category' column")
+
+
+def extract_cells(raw, name):
+    """Validate an extract and return its filled month cells in long format.
+
+    Blank month cells are not part of the extract and are left untouched.
+    """
+    schema = SCHEMAS[name]
+    label = label_column(schema)
+    unknown = [col for col in raw.columns if col not in schema]
+    if unknown:
+        raise ValueError(f"columns not in the {name} layout: {unknown}")
+    months = [col for col in MONTHS if col in raw.columns]
+    if label not in raw.columns or "Year" not in raw.columns or not months:
+        raise ValueError(f"extract needs '{label}', 'Year' and at least one month column")
+
+    filled = raw[months].notna() & (raw[months].astype(str).apply(
+        lambda col: col.str.strip()) != "")
+    # Blank (e.g. whitespace-only) month cells are skipped, not rejected
+    df = clean_dataframe(raw.assign(**{m: raw[m].where(filled[m]) for m in months}), schema)
+    rejected = df.attrs["rejected_cells"]
+    if rejected:
+        raise ValueError(f"unreadable cells in extract: {rejected}")
+    if df["Year"].isna().any() or df[label].isna().any():
+        raise ValueError(f"every row needs a Year and a {label}")
+    if df.duplicated(["Year", label]).any():
+        raise ValueError(f"duplicate (Year, {label}) rows in extract")
+
+    cells = df.melt(id_vars=["Year", label], value_vars=months,
+                    var_name="Month", value_name="Registrations")
+    cells = cells[filled.melt()["value"].to_numpy()]
+    cells[label] = cells[label].astype(object)
+    return cells.reset_index(drop=True)
+
+
+def _delta_files(cache_dir):
+    delta_dir = Path(cache_dir) / DELTA_DIR
+    if not delta_dir.is_dir():
+        return []
+    files = []
+    for path in delta_dir.glob("*.arrow"):
+        seq, _, name = path.stem.partition("-")
+        files.append((int(seq), name, path))
+    return sorted(files)
+
+
+def dataset_version(cache_dir=CACHE_DIR):
+    """Sequence number of the newest appended extract (0 if none)."""
+    files = _delta_files(cache_dir)
+    return files[-1][0] if files else 0
+
+
+def read_deltas(since=0, cache_dir=CACHE_DIR, name=None):
+    """(seq, source, cells) for each delta newer than ``since``, oldest first."""
+    return [(seq, source, read_arrow(path))
+            for seq, source, path in _delta_files(cache_dir)
+            if seq > since and (name is None or source == name)]
+
+
+def append_extract(path, name=None, cache_dir=CACHE_DIR):
+    """Validate a monthly extract and store its cells as the next delta."""
+    raw = read_extract(path)
+    name = name or detect_source(raw)
+    if name not in APPENDABLE:
+        raise ValueError(f"{name} does not take monthly extracts")
+    cells = extract_cells(raw, name)
+
+    delta_dir = Path(cache_dir) / DELTA_DIR
+    delta_dir.mkdir(parents=True, exist_ok=True)
+    seq = dataset_version(cache_dir) + 1
+    write_arrow(cells, delta_dir / f"{seq:06d}-{name}.arrow")
+    return seq, name, len(cells)
+
+
+def upsert_cells(df, cells, name):
+    """Overwrite/insert month cells in a wide source frame; later cells win."""
+    schema = SCHEMAS[name]
+    label = label_column(schema)
+    keys = ["Year", label]
+    updates = cells.pivot_table(index=keys, columns="Month",
+                                values="Registrations", aggfunc="last")
+    updates = updates.add_suffix("_new").reset_index()
+
+    df = df.astype({label: object, "Year": float})
+    updates = updates.astype({label: object, "Year": float})
+    merged = df.merge(updates, on=keys, how="outer", sort=False)
+    for month in MONTHS:
+        new = f"{month}_new"
+        if new in merged.columns:
+            merged[month] = merged.pop(new).combine_first(merged[month])
+    merged["Total"] = merged[MONTHS].fillna(0).sum(axis=1)
+    return coerce_dtypes(merged, schema)
+
+
+def sync_cube(cube, cache_dir=CACHE_DIR):
+    """Apply deltas appended since the cube was built; returns True if any."""
+    if dataset_version(cache_dir) <= cube.version:
+        return False
+    with cube.lock:
+        deltas = read_deltas(cube.version, cache_dir)
+        for seq, name, cells in deltas:
+            cube.apply_cells(name, APPENDABLE[name], cells)
+            cube.version = seq
+    return bool(deltas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or extend the VAHAN data cache.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("build", help="parse every workbook into the cache (default)")
+    append = commands.add_parser("append", help="append a monthly extract")
+    append.add_argument("extract", help="xlsx/csv in the maker-month or category-month layout")
+    append.add_argument("--source", choices=sorted(APPENDABLE),
+                        help="layout of the extract (detected from its columns by default)")
+    args = parser.parse_args(argv)
+
+    if args.command == "append":
+        try:
+            seq, name, count = append_extract(args.extract, args.source)
+        except ValueError as exc:
+            print(f"rejected {args.extract}: {exc}", file=sys.stderr)
+            return 1
+        print(f"{name}: {count} cells stored as dataset version {seq}")
+        return 0
+
+    for name in SOURCES:
+        path = build_source(name)
+        rejected = read_arrow(path).attrs["rejected_cells"]
+        print(f"{name}: {path} ({sum(rejected.values())} rejected cells)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
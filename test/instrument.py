@@ -0,0 +1,163 @@
+"""Per-rerun timing of the dashboard sections.
+
+Wrap a section in ``span(name)``; spans opened between ``begin_run()`` and
+``end_run()`` are collected into one record per rerun, together with the
+panel cache hit/miss counts of that rerun and the memory footprint of
+whatever was passed to ``record_size()``.  Outside a run (``report.py``,
+``ingest.py``) spans cost two perf_counter() calls and are dropped.
+
+A record is written when ``end_run()`` is reached:
+
+    VAHAN_TRACE_LOG=/path/trace.jsonl   append one JSON line per rerun
+    VAHAN_DEBUG=1 or ?debug=1           show the timings below the page
+
+Fragment reruns (see VAHAN.PY) don't reach ``end_run()``; the fragment body
+is wrapped in ``rerun()`` instead, which logs them as runs of their own and
+shows their overlay at the end of the fragment.
+Hits and misses are counted by the panel cache for the current thread only,
+so concurrent sessions don't show up in each other's records.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from panel_cache import panel_cache, sizeof
+
+TRACE_LOG = os.environ.get("VAHAN_TRACE_LOG")
+DEBUG = os.environ.get("VAHAN_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Streamlit runs each session's script in its own thread
+_state = threading.local()
+_log_lock = threading.Lock()
+
+
+def begin_run(kind="app"):
+    _state.run = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "kind": kind,
+        "spans": [],
+        "sizes": {},
+        "cache": {"hits": 0, "misses": 0},
+        "start": time.perf_counter(),
+    }
+    _state.depth = 0
+    panel_cache.track(_state.run["cache"])
+
+
+def current_run():
+    return getattr(_state, "run", None)
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as ``name`` in the current run."""
+    run = current_run()
+    if run is None:
+        yield
+        return
+    entry = {"name": name, "depth": _state.depth}
+    run["spans"].append(entry)  # appended first so nested spans list after it
+    _state.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _state.depth -= 1
+
+
+def record_size(name, value):
+    """Note the memory footprint (bytes) of a frame, table or result."""
+    run = current_run()
+    if run is not None:
+        run["sizes"][name] = sizeof(value)
+
+
+def end_run(version=None, overlay=False):
+    """Close the current run, log it and optionally show it; returns the record."""
+    run = current_run()
+    if run is None:
+        return None
+    _state.run = None
+    panel_cache.track(None)
+
+    counts, stats = run["cache"], panel_cache.stats()
+    record = {
+        "ts": run["ts"],
+        "kind": run["kind"],
+        "version": version,
+        "total_ms": round((time.perf_counter() - run.pop("start")) * 1000, 2),
+        "spans": run["spans"],
+        "cache": {
+            "hits": counts["hits"],
+            "misses": counts["misses"],
+            "entries": stats["entries"],
+            "bytes": stats["bytes"],
+        },
+        "sizes": run["sizes"],
+    }
+    if TRACE_LOG:
+        line = json.dumps(record, default=str)
+        with _log_lock, open(TRACE_LOG, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    if overlay:
+        render_overlay(record)
+    return record
+
+
+def _fragment_rerun():
+    """True when Streamlit reruns only fragments, not the whole script."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+@contextmanager
+def rerun(name, version=None, overlay=False):
+    """Span inside a full run; a run of its own when only ``name`` reruns.
+
+    A full run interrupted by ``st.rerun()`` or ``st.stop()`` never reaches
+    ``end_run()``, so the fragment rerun is detected from Streamlit's run
+    context rather than from a leftover ``current_run()``.  With ``overlay``
+    the fragment rerun's timings are rendered where the block ends.
+    """
+    if not _fragment_rerun():
+        with span(name):
+            yield
+        return
+    begin_run(kind=name)
+    try:
+        yield
+    except BaseException:
+        end_run(version)  # logged, but nothing to render into
+        raise
+    end_run(version, overlay)
+
+
+def debug_enabled():
+    """VAHAN_DEBUG env var or ``?debug=1`` in the page URL."""
+    if DEBUG:
+        return True
+    import streamlit as st
+    return st.query_params.get("debug", "").lower() in ("1", "true", "yes")
+
+
+def render_overlay(record):
+    import pandas as pd
+    import streamlit as st
+
+    cache = record["cache"]
+    what = "Rerun" if record["kind"] == "app" else f"Rerun of {record['kind']}"
+    with st.expander(f"⏱️ {what} took {record['total_ms']:.0f} ms "
+                     f"(panel cache {cache['hits']} hits / {cache['misses']} misses)",
+                     expanded=True):
+        spans = pd.DataFrame(record["spans"], columns=["name", "depth", "ms"])
+        spans["name"] = spans["depth"].map(lambda d: "  " * d) + spans["name"]
+        st.dataframe(spans[["name", "ms"]], hide_index=True, use_container_width=True)
+        sizes = pd.Series(record["sizes"], name="MB", dtype=float) / 2**20
+        sizes["panel cache"] = cache["bytes"] / 2**20
+        st.dataframe(sizes.round(2).rename_axis("object"), use_container_width=True)
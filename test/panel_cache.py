@@ -0,0 +1,166 @@
+"""Memoization of derived panel results.
+
+Results are keyed on (panel, cube token and dataset version, filter values)
+and shared by every session of the process: two analysts looking at the same
+year and makers get the same numbers, so there's no reason to compute them
+twice.
+
+Eviction is LRU under a memory cap.  Entries that depend on filters also
+expire after a TTL; panels memoized with ``filtered=False`` only depend on
+the dataset version and live until the version changes or the cube is
+rebuilt, at which point everything older is dropped.
+
+Sizing is configurable through the environment:
+
+    VAHAN_PANEL_CACHE_MB   memory cap in MiB (default 256)
+    VAHAN_PANEL_CACHE_TTL  TTL in seconds for filtered entries (default 900)
+"""
+import functools
+import inspect
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from cachetools import TLRUCache
+
+# Plotly figure footprint: layout/template objects, then each trace's
+# objects plus its data arrays (measured with tracemalloc on plotly 6)
+FIGURE_BYTES = 128 * 1024
+TRACE_BYTES = 32 * 1024
+TRACE_ARRAYS = ("x", "y", "z", "labels", "values", "text", "customdata", "hovertext")
+
+
+def sizeof(value):
+    """Rough byte size of a cached result."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if hasattr(value, "to_plotly_json"):
+        # Plotly figure: estimated from its traces, serialising it is slow
+        return FIGURE_BYTES + sum(
+            TRACE_BYTES + sum(sizeof(getattr(trace, name, None)) for name in TRACE_ARRAYS)
+            for trace in value.data)
+    if hasattr(value, "values") and isinstance(value.values, np.ndarray):
+        # cube.Table and similar wrappers
+        return value.values.nbytes
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    # Filter values arrive as lists from st.multiselect; make them hashable
+    if isinstance(value, (list, tuple, pd.Series, pd.Index, np.ndarray)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class PanelCache:
+    def __init__(self, max_bytes, ttl, timer=time.monotonic):
+        self.ttl = ttl
+        self._cache = TLRUCache(maxsize=max_bytes, ttu=self._ttu, timer=timer,
+                                getsizeof=sizeof)
+        self._lock = threading.RLock()
+        self._version = None
+        # Panels memoized with filtered=False, kept for the whole version
+        self._unfiltered = set()
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+
+    def _ttu(self, key, value, now):
+        panel, _, _ = key
+        return math.inf if panel in self._unfiltered else now + self.ttl
+
+    def _drop_older(self, version):
+        for key in [k for k in self._cache.keys() if k[1] != version]:
+            self._cache.pop(key, None)
+        self._version = version
+
+    def track(self, counts):
+        """Also count this thread's hits and misses into ``counts``.
+
+        ``counts`` is a dict with "hits" and "misses"; ``None`` stops it.
+        """
+        self._local.counts = counts
+
+    def _count(self, outcome):
+        counts = getattr(self._local, "counts", None)
+        if counts is not None:
+            counts[outcome] += 1
+
+    def get_or_compute(self, panel, version, filters, compute):
+        key = (panel, version, _freeze(filters))
+        with self._lock:
+            if version != self._version:
+                self._drop_older(version)
+            try:
+                value = self._cache[key]
+                self.hits += 1
+            except KeyError:
+                self.misses += 1
+            else:
+                self._count("hits")
+                return value
+        self._count("misses")
+        # Compute outside the lock so other panels aren't blocked meanwhile
+        value = compute()
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                pass  # larger than the whole cache, just don't keep it
+        return value
+
+    def memoize(self, fn=None, *, filtered=True):
+        """Cache ``fn(cube, ...)`` on (name, cube token and version, other arguments).
+
+        Arguments are bound to ``fn``'s signature with defaults filled in, so
+        ``f(cube, 5)``, ``f(cube, n=5)`` and ``f(cube)`` share one entry when 5
+        is the default.  Results expire after the TTL unless ``fn`` is
+        decorated with ``@memoize(filtered=False)``, which marks a panel that
+        doesn't depend on any filter.  Results are shared between callers and
+        must be treated as read-only.
+        """
+        if fn is None:
+            return functools.partial(self.memoize, filtered=filtered)
+        if not filtered:
+            self._unfiltered.add(fn.__qualname__)
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(cube, *args, **kwargs):
+            bound = signature.bind(cube, *args, **kwargs)
+            bound.apply_defaults()
+            filters = tuple(bound.arguments.values())[1:]
+            return self.get_or_compute(
+                fn.__qualname__, (cube.token, cube.version), filters,
+                lambda: fn(*bound.args, **bound.kwargs))
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._cache),
+                "bytes": self._cache.currsize,
+            }
+
+
+panel_cache = PanelCache(
+    max_bytes=int(float(os.environ.get("VAHAN_PANEL_CACHE_MB", 256)) * 2**20),
+    ttl=float(os.environ.get("VAHAN_PANEL_CACHE_TTL", 900)),
+)
+memoize = panel_cache.memoize
@@ -0,0 +1,157 @@
+"""Batch reports for every year x maker group, without the dashboard.
+
+Each (year, group) report holds the tables of ``engine.maker_group_report()``
+and is written as one Excel workbook (a sheet per table) or as one CSV /
+Parquet file per table:
+
+    python report.py                          # every year, groups TOP10 and ALL
+    python report.py --groups groups.json --format parquet --workers 8
+
+A groups file maps group names to maker lists; ``"TOP<n>"`` as the value
+selects the n makers with the most registrations:
+
+    {"EV makers": ["OKAYA EV PVT LTD", "ATHER ENERGY PVT LTD"], "TOP20": "TOP20"}
+
+Reports are spread over a process pool.  Each worker builds its cube from the
+memory-mapped Arrow cache and receives the resolved groups once, in the pool
+initializer; after that a task is just a (year, group name) pair.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from engine import build_cube, maker_group_report, top_makers
+from ingest import CACHE_DIR, load_sources
+
+FORMATS = ("xlsx", "csv", "parquet")
+DEFAULT_GROUPS = {"TOP10": "TOP10", "ALL": "ALL"}
+
+# Cube and groups of the current worker process, set by _init_worker()
+_cube = None
+_groups = None
+
+
+def resolve_groups(cube, groups):
+    """Expand "TOP<n>" / "ALL" group values into maker lists."""
+    all_makers = cube.maker_month.coords['maker'].tolist()
+    resolved = {}
+    for name, makers in groups.items():
+        if isinstance(makers, str):
+            match = re.fullmatch(r"TOP(\d+)", makers.upper())
+            if makers.upper() == "ALL":
+                makers = all_makers
+            elif match and int(match.group(1)) > 0:
+                makers = top_makers(cube, int(match.group(1)))
+            else:
+                raise ValueError(f"group {name!r}: expected a maker list, 'ALL' or 'TOP<n>' "
+                                 "with n > 0")
+        unknown = sorted(set(makers) - set(all_makers))
+        if unknown:
+            print(f"group {name!r}: skipping unknown makers {unknown}", file=sys.stderr)
+        resolved[name] = [maker for maker in makers if maker not in unknown]
+    return resolved
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(text)).strip("_")
+
+
+def write_report(tables, out_dir, stem, fmt):
+    """Write one report; returns the paths written."""
+    out_dir = Path(out_dir)
+    if fmt == "xlsx":
+        path = out_dir / f"{stem}.xlsx"
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for name, table in tables.items():
+                table.to_excel(writer, sheet_name=name, index=False)
+        return [path]
+    paths = []
+    for name, table in tables.items():
+        path = out_dir / f"{stem}-{name}.{fmt}"
+        if fmt == "csv":
+            table.to_csv(path, index=False)
+        else:
+            table.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def _init_worker(cache_dir, groups):
+    global _cube, _groups
+    _cube = build_cube(cache_dir)
+    _groups = groups
+
+
+def _run_report(year, group, out_dir, fmt):
+    tables = maker_group_report(_cube, year, _groups[group])
+    return write_report(tables, out_dir, f"{_slug(group)}-{year}", fmt)
+
+
+def run_reports(years, groups, out_dir, fmt="xlsx", workers=None,
+                cache_dir=CACHE_DIR):
+    """Write a report for every (year, group); returns the paths written."""
+    # Build any missing cache files once here, not in every worker at once
+    load_sources(cache_dir)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache_dir, groups)) as pool:
+        futures = [pool.submit(_run_report, year, group, out_dir, fmt)
+                   for year in years for group in groups]
+        for future in as_completed(futures):
+            paths.extend(future.result())
+    return sorted(paths)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export VAHAN reports per year and maker group.")
+    parser.add_argument("--years", type=int, nargs="+",
+                        help="years to report on (default: every year in the data)")
+    parser.add_argument("--groups", type=Path,
+                        help="JSON file of group name -> maker list, 'ALL' or 'TOP<n>' "
+                             "(default: TOP10 and ALL)")
+    parser.add_argument("--format", choices=FORMATS, default="xlsx")
+    parser.add_argument("--out", type=Path, default=Path("reports"),
+                        help="output directory (default: ./reports)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    cube = build_cube()
+    groups = DEFAULT_GROUPS
+    try:
+        if args.groups:
+            groups = json.loads(args.groups.read_text())
+            if not isinstance(groups, dict):
+                raise ValueError("expected an object of group name -> makers")
+        groups = resolve_groups(cube, groups)
+    except (OSError, ValueError) as exc:
+        print(f"rejected {args.groups}: {exc}", file=sys.stderr)
+        return 1
+
+    known_years = cube.maker_month.coords['year'].tolist()
+    years = args.years or known_years
+    unknown = sorted(set(years) - set(known_years))
+    if unknown:
+        print(f"rejected --years: no data for {unknown} (available: {known_years})",
+              file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    paths = run_reports(years, groups, args.out, args.format, args.workers)
+    print(f"{len(years) * len(groups)} reports ({len(paths)} files) written to "
+          f"{args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
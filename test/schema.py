@@ -0,0 +1,121 @@
+"""Declared column layout of each VAHAN source and the cleaning pass it drives.
+
+Every column is one of three kinds:
+
+    label  Maker / Vehicle Category / Fuel names -> stripped, unquoted,
+           upper-cased and stored as ``category``
+    count  registration counts written with Indian digit grouping
+           ("1,10,490") -> int32
+    year   calendar year -> nullable Int16 (some maker rows have no year)
+
+Cells that can't be read as a non-negative whole number are rejected: they
+become 0 (counts) or <NA> (years) and are tallied in
+``df.attrs["rejected_cells"]``.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from cube import MONTHS, VEHICLE_CLASSES
+
+logger = logging.getLogger(__name__)
+
+LABEL = "label"
+COUNT = "count"
+YEAR = "year"
+
+COUNT_DTYPE = "int32"
+YEAR_DTYPE = "Int16"
+
+
+def _layout(serial, label, value_cols):
+    layout = {serial: COUNT} if serial else {}
+    layout[label] = LABEL
+    layout.update((col, COUNT) for col in value_cols)
+    layout["Year"] = YEAR
+    layout["Total"] = COUNT
+    return layout
+
+
+SCHEMAS = {
+    "maker_category": _layout("S No", "Maker", VEHICLE_CLASSES),
+    "category_month": _layout("S No", "Vehicle Category", MONTHS),
+    "maker_month": _layout("S.No", "Maker", MONTHS),
+    "fuel_category": _layout(None, "Fuel", VEHICLE_CLASSES),
+}
+
+
+def _clean_labels(block):
+    # All label columns in one pass over a flattened string array
+    flat = pd.Series(block.to_numpy(dtype=object).ravel(), dtype="string")
+    flat = flat.str.strip().str.replace(r"[\"']", "", regex=True).str.upper()
+    flat = flat.mask(flat == "")
+    return flat.to_numpy(dtype=object, na_value=None).reshape(block.shape)
+
+
+def _parse_counts(block):
+    """Parse a block of count-like cells; returns (values, rejected mask)."""
+    values = block.to_numpy(dtype=object).ravel()
+    text = pd.Series(values, dtype="string").str.replace(
+        r"[,\"'\s]", "", regex=True)
+    numbers = pd.to_numeric(text, errors="coerce").to_numpy(
+        dtype=float, na_value=np.nan)
+    present = pd.notna(values)
+    bad = present & ~(np.isfinite(numbers) & (numbers >= 0)
+                      & (np.mod(numbers, 1) == 0))
+    numbers[~present | bad] = np.nan
+    return numbers.reshape(block.shape), bad.reshape(block.shape)
+
+
+def clean_dataframe(df, schema):
+    """Normalise ``df`` in place of the old column-by-column cleanup.
+
+    Columns not named in ``schema`` are passed through untouched.
+    """
+    df = df.copy()
+    rejected = {}
+    by_kind = {kind: [col for col, k in schema.items()
+                      if k == kind and col in df.columns]
+               for kind in (LABEL, COUNT, YEAR)}
+
+    labels = by_kind[LABEL]
+    if labels:
+        cleaned = _clean_labels(df[labels])
+        for i, col in enumerate(labels):
+            df[col] = pd.Series(cleaned[:, i], index=df.index).astype("category")
+
+    numeric = by_kind[COUNT] + by_kind[YEAR]
+    if numeric:
+        numbers, bad = _parse_counts(df[numeric])
+        for i, col in enumerate(numeric):
+            column = pd.Series(numbers[:, i], index=df.index)
+            if col in by_kind[YEAR]:
+                df[col] = column.astype(YEAR_DTYPE)
+            else:
+                df[col] = column.fillna(0).astype(COUNT_DTYPE)
+            if bad[:, i].any():
+                rejected[col] = int(bad[:, i].sum())
+
+    df.attrs["rejected_cells"] = rejected
+    if rejected:
+        logger.warning("rejected %d cells: %s", sum(rejected.values()), rejected)
+    return df
+
+
+def coerce_dtypes(df, schema):
+    """Re-apply the schema dtypes to a frame whose values are already numeric."""
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == LABEL:
+            df[col] = df[col].astype("category")
+        elif kind == YEAR:
+            df[col] = df[col].astype(YEAR_DTYPE)
+        else:
+            df[col] = df[col].fillna(0).astype(COUNT_DTYPE)
+    return df
+
+
+def label_column(schema):
+    return next(col for col, kind in schema.items() if kind == LABEL)
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from cube import QUARTERS, Table, pct_change, share
+from report import resolve_groups
+
+
+@pytest.fixture
+def table():
+    """year x maker x month, 2 x 3 x 12; cell value = year offset + maker + month."""
+    values = (np.arange(2).reshape(2, 1, 1) * 100
+              + np.arange(3).reshape(1, 3, 1) * 10
+              + np.arange(12).reshape(1, 1, 12)).astype(np.int32)
+    coords = {"year": [2021, 2022], "maker": ["A", "B", "C"],
+              "month": [f"M{i:02d}" for i in range(12)]}
+    return Table(("year", "maker", "month"), coords, values)
+
+
+# --- sel / sum ---
+
+def test_sel_list_keeps_dim_order_and_skips_unknown_labels(table):
+    picked = table.sel(maker=["C", "X", "A"])
+
+    assert picked.dims == ("year", "maker", "month")
+    assert picked.coords["maker"].tolist() == ["C", "A"]
+    assert picked.values[0, :, 0].tolist() == [20, 0]
+
+
+def test_sel_scalar_drops_dim_and_raises_for_unknown_label(table):
+    picked = table.sel(year=2022, maker="B")
+
+    assert picked.dims == ("month",)
+    assert picked.values[:3].tolist() == [110, 111, 112]
+    with pytest.raises(KeyError):
+        table.sel(maker="X")
+
+
+def test_sum_rolls_up_dims_without_overflow():
+    big = Table(("year", "maker"), {"year": [2022], "maker": ["A", "B"]},
+                np.full((1, 2), 2**31 - 1, dtype=np.int32))
+    total = big.sum("year", "maker")
+
+    assert total.dims == ()
+    assert total.values == 2 * (2**31 - 1)
+
+
+def test_sum_keeps_remaining_coords(table):
+    per_maker = table.sum("year", "month")
+
+    assert per_maker.dims == ("maker",)
+    assert per_maker.coords["maker"].tolist() == ["A", "B", "C"]
+    assert per_maker.values.tolist() == [1332, 1572, 1812]
+
+
+# --- by_quarter / pct_change / share ---
+
+def test_by_quarter_folds_months(table):
+    quarters = table.sel(year=2021, maker="A").by_quarter()
+
+    assert quarters.dims == ("quarter",)
+    assert list(quarters.coords["quarter"]) == QUARTERS
+    assert quarters.values.tolist() == [3, 12, 21, 30]
+
+
+def test_pct_change_compares_last_label_with_the_one_before():
+    table = Table(("maker", "year"), {"maker": ["A", "B"], "year": [2021, 2022]},
+                  np.array([[50, 75], [0, 10]]))
+    growth = pct_change(table, "year")
+
+    assert growth.dims == ("maker",)
+    assert growth.values[0] == pytest.approx(50.0)
+    assert np.isnan(growth.values[1])          # no base the year before
+    single = pct_change(table.sel(year=[2022]), "year")
+    assert np.isnan(single.values).all()
+
+
+def test_share_is_percent_of_total_and_zero_for_empty_rows():
+    table = Table(("year", "maker"), {"year": [2021, 2022], "maker": ["A", "B"]},
+                  np.array([[1, 3], [0, 0]]))
+    shares = share(table, "maker")
+
+    assert shares.values.tolist() == [[25.0, 75.0], [0.0, 0.0]]
+
+
+# --- top_n ---
+
+@pytest.mark.parametrize("n, expected", [
+    (2, ["C", "A"]),
+    (5, ["C", "A", "D", "B"]),
+    (0, []),
+    (-1, []),
+])
+def test_top_n_sorts_descending(n, expected):
+    table = Table(("maker",), {"maker": ["A", "B", "C", "D"]}, np.array([7, 1, 9, 6]))
+    top = table.top_n(n)
+
+    assert top.coords["maker"].tolist() == expected
+    assert len(top.values) == len(expected)
+
+
+def test_resolve_groups_rejects_top0(cube):
+    assert resolve_groups(cube, {"T1": "top1"}) == {"T1": ["HERO"]}
+    with pytest.raises(ValueError, match="n > 0"):
+        resolve_groups(cube, {"none": "TOP0"})
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from figures import cap_traces
+
+
+def long_frame(totals, quarters=("Q1", "Q2")):
+    """One row per maker and quarter; each quarter holds half the maker's total."""
+    return pd.DataFrame([{"Maker": maker, "Quarter": quarter, "Registrations": total // 2}
+                         for maker, total in totals.items() for quarter in quarters])
+
+
+def test_few_series_are_returned_unchanged():
+    frame = long_frame({"A": 10, "B": 20})
+    assert cap_traces(frame, "Maker", top_n=2) is frame
+
+
+def test_largest_series_keep_their_order_and_the_rest_become_others():
+    frame = long_frame({"A": 10, "B": 40, "C": 20, "D": 30, "E": 2})
+    capped = cap_traces(frame, "Maker", top_n=2)
+
+    assert capped["Maker"].unique().tolist() == ["B", "D", "Others (3)"]
+    assert list(capped.columns) == list(frame.columns)
+    others = capped[capped["Maker"] == "Others (3)"]
+    assert others["Quarter"].tolist() == ["Q1", "Q2"]
+    assert others["Registrations"].tolist() == [5 + 10 + 1] * 2
+    assert capped["Registrations"].sum() == frame["Registrations"].sum()
+
+
+def test_others_is_summed_per_x_value():
+    frame = pd.DataFrame({"Maker": ["A", "B", "C", "B", "C", "A"],
+                          "Year": [2021, 2021, 2021, 2022, 2022, 2022],
+                          "Registrations": [100, 1, 2, 3, 4, 100]})
+    capped = cap_traces(frame, "Maker", top_n=1)
+
+    others = capped[capped["Maker"] == "Others (2)"].set_index("Year")["Registrations"]
+    assert others.to_dict() == {2021: 3, 2022: 7}
+    assert capped["Maker"].iloc[-1] == "Others (2)"
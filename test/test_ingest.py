@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import full_year
+from cube import MONTHS, Table
+from engine import growth_view, maker_group_report
+from ingest import (append_extract, dataset_version, extract_cells, read_deltas,
+                    sync_cube, upsert_cells)
+
+
+def extract(tmp_path, rows, name="extract.csv"):
+    """Write a maker-month extract csv; rows are dicts of column -> cell."""
+    path = tmp_path / name
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+# --- extract_cells ---
+
+def test_extract_cells_keeps_only_filled_months():
+    raw = pd.DataFrame([{"Maker": " hero ", "Year": "2022", "JAN": "1,200", "FEB": ""}])
+    cells = extract_cells(raw, "maker_month")
+
+    assert cells.to_dict("records") == [
+        {"Year": 2022, "Maker": "HERO", "Month": "JAN", "Registrations": 1200}]
+
+
+@pytest.mark.parametrize("row, message", [
+    ({"Maker": "HERO", "Year": 2022, "JAN": 1, "Remarks": "x"}, "columns not in"),
+    ({"Maker": "HERO", "Year": 2022, "JAN": "-3"}, "unreadable cells"),
+    ({"Maker": "HERO", "Year": 2022, "JAN": "1.5"}, "unreadable cells"),
+    ({"Maker": "HERO", "Year": None, "JAN": 1}, "needs a Year"),
+    ({"Maker": "HERO", "Year": 2022}, "at least one month"),
+])
+def test_extract_cells_rejects_bad_extracts(row, message):
+    with pytest.raises(ValueError, match=message):
+        extract_cells(pd.DataFrame([row]), "maker_month")
+
+
+def test_extract_cells_rejects_duplicate_rows():
+    raw = pd.DataFrame([{"Maker": "HERO", "Year": 2022, "JAN": 1},
+                        {"Maker": "hero", "Year": 2022, "JAN": 2}])
+    with pytest.raises(ValueError, match="duplicate"):
+        extract_cells(raw, "maker_month")
+
+
+def test_rejected_extract_writes_no_delta(tmp_path):
+    path = extract(tmp_path, [{"Maker": "HERO", "Year": 2022, "JAN": "oops"}])
+    with pytest.raises(ValueError):
+        append_extract(path, cache_dir=tmp_path / "cache")
+    assert dataset_version(tmp_path / "cache") == 0
+
+
+# --- upsert_cells ---
+
+def test_upsert_overwrites_inserts_and_later_cells_win(wide):
+    df = wide("Maker", [("HERO", 2022, full_year(20))], MONTHS, "S.No")
+    cells = pd.DataFrame({
+        "Year": [2022, 2022, 2023, 2022],
+        "Maker": ["HERO", "NEW CO", "HERO", "HERO"],
+        "Month": ["JAN", "FEB", "JAN", "JAN"],
+        "Registrations": [1, 7, 3, 99],
+    })
+    merged = upsert_cells(df, cells, "maker_month").set_index(["Maker", "Year"])
+
+    hero = merged.loc[("HERO", 2022)]
+    assert hero["JAN"] == 99                       # last cell for the key wins
+    assert hero["FEB"] == 20                       # untouched months are kept
+    assert hero["Total"] == 20 * 11 + 99
+    assert merged.loc[("NEW CO", 2022), ["FEB", "Total"]].tolist() == [7, 7]
+    assert merged.loc[("HERO", 2023), ["JAN", "FEB"]].tolist() == [3, 0]
+    assert merged["JAN"].dtype == "int32" and str(merged.index.levels[1].dtype) == "Int16"
+
+
+# --- Table.with_cells ---
+
+def test_with_cells_grows_axes_without_touching_the_original():
+    table = Table(("year", "maker"), {"year": [2021, 2022], "maker": ["B", "D"]},
+                  np.array([[1, 2], [3, 4]], dtype=np.int32))
+    table.sel(maker=["D"])  # builds the cached label index
+
+    updated = table.with_cells({"year": np.array([2023, 2022]),
+                                "maker": np.array(["A", "D"], dtype=object)},
+                               np.array([9, 40]))
+
+    assert table.values.tolist() == [[1, 2], [3, 4]]
+    assert table.coords["maker"].tolist() == ["B", "D"]
+    assert updated.coords["year"].tolist() == [2021, 2022, 2023]
+    assert updated.coords["maker"].tolist() == ["A", "B", "D"]
+    assert updated.values.tolist() == [[0, 1, 2], [0, 3, 40], [9, 0, 0]]
+    assert updated.sel(year=2021, maker="D").values == 2
+
+
+# --- sync_cube ---
+
+def test_sync_cube_applies_new_deltas_once(cube, tmp_path):
+    cache_dir = tmp_path / "cache"
+    old_table = cube.maker_month
+    append_extract(extract(tmp_path, [{"Maker": "HERO", "Year": 2022, "JAN": 50},
+                                      {"Maker": "NEW CO", "Year": 2022, "MAR": 8}]),
+                   cache_dir=cache_dir)
+
+    assert sync_cube(cube, cache_dir) is True
+    assert cube.version == 1
+    assert cube.maker_month is not old_table
+    year_2022 = cube.maker_month.sel(year=2022)
+    assert year_2022.sel(maker="HERO", month="JAN").values == 50
+    assert year_2022.sel(maker="HERO", month="FEB").values == 20
+    assert year_2022.sel(maker="NEW CO", month="MAR").values == 8
+
+    table = cube.maker_month
+    assert sync_cube(cube, cache_dir) is False
+    assert cube.maker_month is table and cube.version == 1
+
+    append_extract(extract(tmp_path, [{"Maker": "HERO", "Year": 2022, "JAN": 51}], "b.csv"),
+                   cache_dir=cache_dir)
+    assert sync_cube(cube, cache_dir) is True
+    assert cube.version == 2
+    assert cube.maker_month.sel(year=2022, maker="HERO", month="JAN").values == 51
+    assert [seq for seq, _, _ in read_deltas(1, cache_dir)] == [2]
+
+
+def test_partial_new_year_stays_out_of_yoy(cube, tmp_path):
+    cache_dir = tmp_path / "cache"
+    jan_to_aug = {month: 1000 for month in MONTHS[:8]}
+    append_extract(extract(tmp_path, [{"Maker": "NEW CO", "Year": 2023, "JAN": 4},
+                                      {"Maker": "HERO", "Year": 2023, **jan_to_aug}]),
+                   cache_dir=cache_dir)
+    sync_cube(cube, cache_dir)
+
+    frame, growth = growth_view(cube, "maker_month", "maker", ["HERO"], "YOY", 2022)
+    assert frame["Year"].tolist() == [2021, 2022]
+    assert growth["HERO"] == pytest.approx(100.0)
+
+    # Q3 has only JUL and AUG: QoQ compares the complete Q2 with Q1
+    frame, growth = growth_view(cube, "maker_month", "maker", ["HERO"], "QOQ", 2023)
+    assert frame["Quarter"].tolist() == ["Q1", "Q2"]
+    assert growth["HERO"] == pytest.approx(0.0)
+
+    # The report compares the loaded months of 2023 with the same months of 2022
+    summary = maker_group_report(cube, 2023, ["HERO", "NEW CO"])["summary"]
+    summary = summary.set_index("Maker")
+    assert summary.loc["NEW CO", "Registrations"] == 4
+    assert summary.loc["HERO", "YoY Growth (%)"] == pytest.approx((8000 / 160 - 1) * 100)
+    assert summary.loc["HERO", "QoQ Growth (%)"] == pytest.approx(0.0)
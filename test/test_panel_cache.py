@@ -0,0 +1,141 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from cube import Cube, Table
+from engine import top_maker_share
+from panel_cache import PanelCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def cache(clock):
+    return PanelCache(max_bytes=2**20, ttl=60, timer=clock)
+
+
+def counting(cache):
+    """Memoized f(cube, n=5, label=None) that records its calls."""
+    calls = []
+
+    @cache.memoize
+    def panel(cube, n=5, label=None):
+        calls.append((n, label))
+        return np.full(n, cube.version)
+
+    return panel, calls
+
+
+def test_rebuilt_cube_at_the_same_version_gets_its_own_results(cube):
+    # Same dataset version, different maker_class, as after a workbook change
+    maker_class = cube.maker_class
+    rebuilt = Cube(cube.maker_month, cube.category_month,
+                   Table(maker_class.dims, maker_class.coords, maker_class.values[:, ::-1]),
+                   cube.fuel_class, version=cube.version)
+
+    assert top_maker_share(cube)["Maker"].tolist() == ["HERO", "BAJAJ"]
+    assert top_maker_share(rebuilt)["Maker"].tolist() == ["BAJAJ", "HERO"]
+
+
+def test_keyword_and_default_arguments_share_an_entry(cache):
+    panel, calls = counting(cache)
+    cube = SimpleNamespace(token=0, version=0)
+
+    assert panel(cube) is panel(cube, 5) is panel(cube, n=5)
+    panel(cube, label="x")
+    panel(cube, 5, "x")
+    assert calls == [(5, None), (5, "x")]
+
+
+def test_filtered_entries_expire_after_the_ttl(cache, clock):
+    panel, calls = counting(cache)
+    cube = SimpleNamespace(token=0, version=0)
+
+    panel(cube, 3)
+    clock.now = 59
+    panel(cube, 3)
+    assert calls == [(3, None)]
+    clock.now = 61
+    panel(cube, 3)
+    assert calls == [(3, None), (3, None)]
+
+
+def test_unfiltered_panels_live_for_the_whole_version(cache, clock):
+    calls = []
+
+    @cache.memoize(filtered=False)
+    def market(cube, n=5):
+        calls.append(n)
+        return np.arange(n)
+
+    cube = SimpleNamespace(token=0, version=0)
+    market(cube)
+    clock.now = 10_000
+    assert market(cube, n=5).tolist() == [0, 1, 2, 3, 4]
+    assert calls == [5]
+    cube.version = 1
+    market(cube)
+    assert calls == [5, 5]
+
+
+def test_lru_eviction_under_the_byte_cap(clock):
+    cache = PanelCache(max_bytes=250, ttl=60, timer=clock)
+    def hundred_bytes():
+        return np.zeros(100, dtype=np.int8)
+
+    cache.get_or_compute("a", 0, ("f",), hundred_bytes)
+    cache.get_or_compute("b", 0, ("f",), hundred_bytes)
+    cache.get_or_compute("a", 0, ("f",), hundred_bytes)     # a is now the most recent
+    cache.get_or_compute("c", 0, ("f",), hundred_bytes)     # evicts b
+
+    assert cache.stats()["bytes"] == 200
+    before = cache.stats()["misses"]
+    cache.get_or_compute("a", 0, ("f",), hundred_bytes)
+    cache.get_or_compute("b", 0, ("f",), hundred_bytes)
+    assert cache.stats()["misses"] == before + 1
+    # A value larger than the whole cache is returned but not kept
+    big = cache.get_or_compute("d", 0, ("f",), lambda: np.zeros(300, dtype=np.int8))
+    assert len(big) == 300 and cache.stats()["entries"] == 2
+
+
+def test_new_version_or_cube_drops_older_entries(cache):
+    panel, calls = counting(cache)
+    cube = SimpleNamespace(token=0, version=0)
+    panel(cube, 1)
+    panel(cube, 2)
+    assert cache.stats()["entries"] == 2
+
+    cube.version = 1
+    assert panel(cube, 1).tolist() == [1]
+    assert cache.stats()["entries"] == 1
+
+    panel(SimpleNamespace(token=1, version=1), 1)
+    assert cache.stats()["entries"] == 1
+    assert len(calls) == 4
+
+
+def test_track_counts_only_the_calling_thread(cache):
+    panel, _ = counting(cache)
+    cube = SimpleNamespace(token=0, version=0)
+    counts = {"hits": 0, "misses": 0}
+
+    cache.track(counts)
+    panel(cube)
+    panel(cube)
+    cache.track(None)
+    panel(cube)
+
+    assert counts == {"hits": 1, "misses": 1}
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from ingest import read_arrow, write_arrow
+from schema import SCHEMAS, clean_dataframe
+
+
+@pytest.fixture
+def maker_month(raw_frame):
+    """Raw maker-month frame; each row is (maker, year, {month: cell})."""
+    return lambda rows: raw_frame("Maker", rows, serial="S.No")
+
+
+def test_indian_digit_grouping(maker_month):
+    raw = maker_month([("A", 2022, {"JAN": "1,10,490", "FEB": "12,34,56,789",
+                                    "MAR": " 1,000 ", "APR": 42})])
+    df = clean_dataframe(raw, SCHEMAS["maker_month"])
+
+    assert df.loc[0, ["JAN", "FEB", "MAR", "APR"]].tolist() == [110490, 123456789, 1000, 42]
+    assert df["JAN"].dtype == "int32"
+    assert df.attrs["rejected_cells"] == {}
+
+
+def test_labels_are_stripped_unquoted_and_upper_cased(maker_month):
+    raw = maker_month([("  'hero motocorp ltd' ", 2022, {}),
+                       ('"Bajaj Auto Ltd"', 2022, {}),
+                       ("   ", 2022, {})])
+    df = clean_dataframe(raw, SCHEMAS["maker_month"])
+
+    assert df["Maker"].dtype == "category"
+    assert df["Maker"].tolist()[:2] == ["HERO MOTOCORP LTD", "BAJAJ AUTO LTD"]
+    assert pd.isna(df["Maker"].iloc[2])
+
+
+def test_negative_and_fractional_counts_are_rejected(maker_month):
+    raw = maker_month([("A", 2022, {"JAN": -5, "FEB": "12.5", "MAR": "n/a", "APR": 7})])
+    df = clean_dataframe(raw, SCHEMAS["maker_month"])
+
+    assert df.loc[0, ["JAN", "FEB", "MAR", "APR"]].tolist() == [0, 0, 0, 7]
+    assert df.attrs["rejected_cells"] == {"JAN": 1, "FEB": 1, "MAR": 1}
+
+
+def test_unreadable_year_becomes_na(maker_month):
+    raw = maker_month([("A", "2022", {}), ("B", None, {}), ("C", "twenty", {})])
+    df = clean_dataframe(raw, SCHEMAS["maker_month"])
+
+    assert str(df["Year"].dtype) == "Int16"
+    assert df["Year"].iloc[0] == 2022
+    assert df["Year"].iloc[1:].isna().all()
+    # A missing year is not a rejected cell, an unreadable one is
+    assert df.attrs["rejected_cells"] == {"Year": 1}
+
+
+def test_columns_outside_the_schema_pass_through(maker_month):
+    raw = maker_month([("A", 2022, {})])
+    raw["Remarks"] = ["keep me"]
+    df = clean_dataframe(raw, SCHEMAS["maker_month"])
+
+    assert df["Remarks"].tolist() == ["keep me"]
+
+
+def test_rejected_cells_survive_the_arrow_cache(maker_month, tmp_path):
+    raw = maker_month([("A", 2022, {"JAN": -1, "FEB": "x"}), ("B", 2022, {"JAN": "1.5"})])
+    df = clean_dataframe(raw, SCHEMAS["maker_month"])
+    path = tmp_path / "maker_month.arrow"
+
+    write_arrow(df, path)
+    loaded = read_arrow(path)
+
+    assert loaded.attrs["rejected_cells"] == {"JAN": 2, "FEB": 1}
+    pd.testing.assert_frame_equal(loaded, df)